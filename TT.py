@@ -1,15 +1,24 @@
 # Quantitative Market Sentiment Analyzer — Cleaned Version ✅
 
 # --- INSTALL REQUIRED PACKAGES ---
-# pip install yfinance textblob newsapi-python pandas streamlit plotly
+# pip install yfinance vaderSentiment newsapi-python pandas streamlit plotly
+
+# All data-access, caching and figure helpers live in core.py; this script is
+# the UI entry point: sidebar inputs, ingestion orchestration and rendering.
 
-import yfinance as yf
 import pandas as pd
-from textblob import TextBlob
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import streamlit as st
-from newsapi import NewsApiClient
-import plotly.express as px
+
+from core import (
+    categorize_sentiment,
+    fetch_news_sentiment,
+    fetch_stock_data,
+    make_pie_facets,
+    make_price_facets,
+    make_sentiment_bar,
+)
 
 # --- CONFIG ---
 st.set_page_config(page_title="📊 Market Sentiment Analyzer", layout="wide")
@@ -20,99 +29,86 @@ STOCKS = st.sidebar.multiselect("Select stocks:", ['AAPL', 'MSFT', 'TSLA', 'GOOG
 START_DATE = st.sidebar.date_input("Start Date", datetime.now() - timedelta(days=30))
 END_DATE = st.sidebar.date_input("End Date", datetime.now())
 
-# --- NEWS API KEY (Replace with your key) ---
-NEWS_API_KEY = "02b6b05c148645eab57c843d788cc094"
-newsapi = NewsApiClient(api_key=NEWS_API_KEY)
-
-# --- UTILITY FUNCTIONS ---
-def fetch_stock_data(ticker):
-    df = yf.download(ticker, start=START_DATE, end=END_DATE)
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(0)  # Flatten MultiIndex
-
-    df = df[['Open', 'High', 'Low', 'Close', 'Volume']]  # Select only required columns
-    df.reset_index(inplace=True)
-    df['Ticker'] = ticker
-    return df
-
-
-def fetch_news_sentiment(ticker):
-    try:
-        articles = newsapi.get_everything(q=f"{ticker} stock", language="en", sort_by="relevancy", page_size=10)
-        headlines = [article['title'] for article in articles['articles']]
-        sentiments = [TextBlob(headline).sentiment.polarity for headline in headlines]
-        return pd.DataFrame({'Date': datetime.now().date(), 'Ticker': ticker, 'Headline': headlines, 'Sentiment': sentiments})
-    except:
-        return pd.DataFrame(columns=['Date', 'Ticker', 'Headline', 'Sentiment'])
-
 # --- DATA INGESTION ---
-price_frames = []
+# Prices come back in a single batched request; news calls are still one
+# HTTP round-trip per stock, so run those concurrently.
+today = datetime.now().date()
+stock_prices = fetch_stock_data(tuple(STOCKS), START_DATE, END_DATE)
+
+# Collect news results as each fetch completes, updating a placeholder so the
+# user sees progress immediately instead of a blank page until the slowest
+# request returns.
+status = st.empty()
 sentiment_frames = []
-
-for stock in STOCKS:
-    stock_df = fetch_stock_data(stock)
-    news_df = fetch_news_sentiment(stock)
-
-    price_frames.append(stock_df)
-    sentiment_frames.append(news_df)
+with ThreadPoolExecutor(max_workers=min(16, max(1, len(STOCKS)))) as executor:
+    news_futures = {executor.submit(fetch_news_sentiment, stock, today): stock for stock in STOCKS}
+    for done, future in enumerate(as_completed(news_futures), start=1):
+        sentiment_frames.append(future.result())
+        status.text(f"Fetched news for {news_futures[future]} ({done}/{len(news_futures)})")
+status.empty()
 
 # --- COMBINE ALL DATA ---
-stock_prices = pd.concat(price_frames, ignore_index=True)
 stock_news = pd.concat(sentiment_frames, ignore_index=True)
 
-# --- PRICE CHART ---
-st.subheader("📉 Stock Closing Prices")
-for stock in STOCKS:
-    subset = stock_prices[stock_prices['Ticker'] == stock].copy()
+# Ticker is low-cardinality, so categorical codes shrink the column to one
+# byte per row and let the groupbys below hash small ints instead of strings.
+stock_prices['Ticker'] = stock_prices['Ticker'].astype('category')
+stock_news['Ticker'] = stock_news['Ticker'].astype('category')
 
-    if subset.empty or 'Date' not in subset.columns or 'Close' not in subset.columns:
-        st.warning(f"No valid price data available for {stock}")
-        continue
+if not stock_news.empty:
+    stock_news['Category'] = categorize_sentiment(stock_news['Sentiment'])
 
-    try:
-        subset['Date'] = pd.to_datetime(subset['Date'])
-        fig = px.line(subset, x='Date', y='Close', title=f"{stock} Closing Price")
-        st.plotly_chart(fig)
-    except Exception as e:
-        st.error(f"Error plotting data for {stock}: {e}")
+# Partition each frame by ticker once; the render sections below reuse these
+# dicts instead of re-scanning the full frames with boolean masks per loop.
+EMPTY_DF = pd.DataFrame()
+price_groups = dict(tuple(stock_prices.groupby('Ticker', sort=False)))
+news_groups = dict(tuple(stock_news.groupby('Ticker', sort=False)))
 
-# --- NEWS SENTIMENT TABLE ---
-st.subheader("📰 Latest News Sentiment")
-for stock in STOCKS:
-    st.markdown(f"### {stock}")
-    news_subset = stock_news[stock_news['Ticker'] == stock]
-    if not news_subset.empty:
-        st.dataframe(news_subset[['Headline', 'Sentiment']])
+# --- PRICE CHART ---
+with st.expander("📉 Stock Closing Prices", expanded=True):
+    for stock in STOCKS:
+        if stock not in price_groups:
+            st.warning(f"No valid price data available for {stock}")
+
+    if stock_prices.empty or 'Date' not in stock_prices.columns or 'Close' not in stock_prices.columns:
+        st.warning("No valid price data available.")
     else:
-        st.info("No news data found.")
+        try:
+            fig = make_price_facets(stock_prices)
+            st.plotly_chart(fig, use_container_width=True)
+        except Exception as e:
+            st.error(f"Error plotting price data: {e}")
 
-# --- AVERAGE SENTIMENT BAR ---
-st.subheader("📊 Average Sentiment per Stock")
-if not stock_news.empty:
-    avg_sentiment = stock_news.groupby("Ticker")["Sentiment"].mean().reset_index()
-    fig = px.bar(avg_sentiment, x="Ticker", y="Sentiment", color="Ticker", title="Average Sentiment")
-    st.plotly_chart(fig)
-else:
-    st.info("No sentiment data available.")
+# --- NEWS SENTIMENT TABLE ---
+with st.expander("📰 Latest News Sentiment", expanded=False):
+    for stock in STOCKS:
+        st.markdown(f"### {stock}")
+        news_subset = news_groups.get(stock, EMPTY_DF)
+        if not news_subset.empty:
+            # Round in the data rather than via a Styler — a Styler formats
+            # cell-by-cell in Python and ships a much heavier payload.
+            view = news_subset[['Date', 'Headline', 'Sentiment']].sort_values('Date', ascending=False)
+            view = view.assign(Sentiment=view['Sentiment'].round(2))
+            st.dataframe(view, use_container_width=True, hide_index=True)
+        else:
+            st.info("No news data found.")
 
-# --- PIE CHART ---
-def categorize_sentiment(value):
-    if value > 0.1:
-        return "Positive"
-    elif value < -0.1:
-        return "Negative"
-    else:
-        return "Neutral"
-
-st.subheader("🥧 Sentiment Distribution by Category")
-for stock in STOCKS:
-    st.markdown(f"### {stock}")
-    news = stock_news[stock_news['Ticker'] == stock].copy()
-    if not news.empty:
-        news['Category'] = news['Sentiment'].apply(categorize_sentiment)
-        pie_df = news['Category'].value_counts().reset_index()
-        pie_df.columns = ['Category', 'Count']
-        fig = px.pie(pie_df, names='Category', values='Count', title=f"{stock} Sentiment Breakdown")
+# --- AVERAGE SENTIMENT BAR ---
+with st.expander("📊 Average Sentiment per Stock", expanded=True):
+    if not stock_news.empty:
+        avg_sentiment = stock_news.groupby("Ticker", observed=True, sort=False)["Sentiment"].mean().reset_index()
+        fig = make_sentiment_bar(avg_sentiment)
         st.plotly_chart(fig)
     else:
-        st.warning("No sentiment data to display pie chart.")
+        st.info("No sentiment data available.")
+
+# --- PIE CHART ---
+with st.expander("🥧 Sentiment Distribution by Category", expanded=False):
+    # Expander bodies still execute when collapsed, so the figure build is
+    # additionally gated on a checkbox to keep it off the default rerun path.
+    if st.checkbox("Show sentiment breakdown", value=False):
+        if not stock_news.empty:
+            fig = make_pie_facets(stock_news)
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.warning("No sentiment data to display pie chart.")
@@ -0,0 +1,199 @@
+# Shared data-access, caching and figure helpers for the sentiment dashboard.
+# Any UI entry point that imports from here shares the same st.cache_data /
+# st.cache_resource pools, the Parquet disk caches and the scoring caches.
+
+import yfinance as yf
+import numpy as np
+import pandas as pd
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from functools import lru_cache
+from pathlib import Path
+import streamlit as st
+import requests
+from requests.adapters import HTTPAdapter
+from newsapi import NewsApiClient
+from newsapi.newsapi_exception import NewsAPIException
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# --- NEWS API KEY (Replace with your key) ---
+NEWS_API_KEY = "02b6b05c148645eab57c843d788cc094"
+
+@st.cache_resource
+def get_newsapi(key):
+    """Build the NewsAPI client once per server process, not once per rerun.
+
+    The pooled session means every news call rides an existing keep-alive
+    connection instead of paying a fresh TCP+TLS handshake.
+    """
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+    return NewsApiClient(api_key=key, session=session)
+
+newsapi = get_newsapi(NEWS_API_KEY)
+
+# --- SENTIMENT ANALYZER ---
+@st.cache_resource
+def get_sia():
+    """Load the VADER lexicon once per server process; scoring is then plain
+    dict lookups, far cheaper than building a TextBlob parse per headline."""
+    return SentimentIntensityAnalyzer()
+
+sia = get_sia()
+
+
+@lru_cache(maxsize=4096)
+def score_headline(headline):
+    """Compound VADER score for one headline.
+
+    Cached so a headline is tokenized and scored at most once per session,
+    even when the same story surfaces again for a different ticker.
+    """
+    return sia.polarity_scores(headline)['compound']
+
+# --- LOCAL PRICE CACHE ---
+# Parquet is columnar and compressed, so warm reloads are a fast local read
+# instead of a Yahoo round-trip, and (unlike st.cache_data) it survives
+# app restarts.
+PRICE_CACHE_DIR = Path("data/prices")
+PRICE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# News results get the same treatment, keyed per (ticker, day) so they
+# refresh daily; this also protects the NewsAPI request quota across
+# restarts, which st.cache_data alone does not.
+NEWS_CACHE_DIR = Path("data/news")
+NEWS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# --- SENTIMENT CATEGORIES ---
+# VADER's recommended compound-score thresholds (±0.05); the old ±0.1 cut-offs
+# were tuned for TextBlob polarity and misfiled mildly polar headlines.
+SENTIMENT_BINS = [-np.inf, -0.05, 0.05, np.inf]
+SENTIMENT_LABELS = ["Negative", "Neutral", "Positive"]
+
+def categorize_sentiment(series):
+    """Bucket a sentiment Series into Negative/Neutral/Positive in one vectorized pass."""
+    return pd.cut(series, bins=SENTIMENT_BINS, labels=SENTIMENT_LABELS)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_stock_data(tickers, start, end):
+    """Load OHLCV from the per-ticker Parquet cache, downloading only missing dates.
+
+    Dates are explicit arguments (not module globals) so they are part of the
+    cache key and reruns with unchanged inputs skip this function entirely.
+    The disk cache is append-only: each run checks the last cached date per
+    ticker, tops up just the missing tail in one batched request, and merges
+    it back idempotently (dedup on Date) before trimming to the window.
+    """
+    start_ts, end_ts = pd.Timestamp(start), pd.Timestamp(end)
+    cached = {}
+    fetch_from = {}
+    for ticker in tickers:
+        cache_file = PRICE_CACHE_DIR / f"{ticker}.parquet"
+        if cache_file.exists():
+            df = pd.read_parquet(cache_file)
+            if df.empty:
+                fetch_from[ticker] = start_ts  # Stale empty file; treat as a miss
+                continue
+            cached[ticker] = df
+            if df['Date'].min() > start_ts:
+                fetch_from[ticker] = start_ts  # Window starts before cached history
+            elif df['Date'].max() + pd.Timedelta(days=1) < end_ts:
+                fetch_from[ticker] = df['Date'].max() + pd.Timedelta(days=1)
+        else:
+            fetch_from[ticker] = start_ts
+
+    if fetch_from:
+        raw = yf.download(" ".join(fetch_from), start=min(fetch_from.values()), end=end,
+                          group_by="ticker", auto_adjust=False, threads=True, progress=False)
+        for ticker, effective_start in fetch_from.items():
+            df = raw[ticker] if isinstance(raw.columns, pd.MultiIndex) else raw.copy()
+            if df.empty:
+                # No new rows — a weekend/holiday gap or a failed download.
+                # yfinance's empty frame has neither the OHLCV columns nor a
+                # named index, so fall back to the cached frame instead of
+                # crashing on the reset/parse below.
+                continue
+            df = df[['Open', 'High', 'Low', 'Close', 'Volume']]  # Select only required columns
+            df = df.reset_index()
+            df['Date'] = pd.to_datetime(df['Date'])  # Parse once here, not per render
+            df['Ticker'] = ticker
+            df = df.dropna(subset=['Close'])
+            df = df[df['Date'] >= effective_start]
+            if df.empty:
+                continue  # All rows were NaN padding; don't persist a 0-row frame
+            if ticker in cached:
+                df = pd.concat([cached[ticker], df], ignore_index=True)
+            df = df.drop_duplicates(subset='Date', keep='last').sort_values('Date', ignore_index=True)
+            # float32 is plenty for chart-bound prices and halves the frame size.
+            df = df.astype({'Open': 'float32', 'High': 'float32', 'Low': 'float32', 'Close': 'float32'})
+            df['Volume'] = df['Volume'].fillna(0).astype('int64')
+            df.to_parquet(PRICE_CACHE_DIR / f"{ticker}.parquet", index=False)
+            cached[ticker] = df
+
+    frames = [cached[t] for t in tickers if t in cached]
+    if not frames:
+        return pd.DataFrame(columns=['Date', 'Open', 'High', 'Low', 'Close', 'Volume', 'Ticker'])
+    combined = pd.concat(frames, ignore_index=True)
+    in_window = (combined['Date'] >= start_ts) & (combined['Date'] < end_ts)
+    return combined[in_window].reset_index(drop=True)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_news_sentiment(ticker, day_bucket):
+    """Fetch recent headlines and score them; day_bucket keys the cache per day."""
+    cache_file = NEWS_CACHE_DIR / f"{ticker}_{day_bucket}.parquet"
+    if cache_file.exists():
+        return pd.read_parquet(cache_file)
+
+    try:
+        articles = newsapi.get_everything(q=f"{ticker} stock", language="en", sort_by="relevancy", page_size=10)
+        headlines = []
+        published = []
+        for article in articles['articles']:
+            if article.get('title'):
+                headlines.append(article['title'])
+                published.append(article.get('publishedAt'))
+        # score_headline is lru_cached, so repeated wire stories — within this
+        # call or across tickers — are tokenized and scored only once.
+        sentiments = [score_headline(headline) for headline in headlines]
+        # One vectorized parse for the whole batch; bad timestamps become NaT.
+        dates = pd.to_datetime(published, utc=True, errors='coerce').date
+        result = pd.DataFrame({'Date': dates, 'Ticker': ticker, 'Headline': headlines,
+                               'Sentiment': pd.Series(sentiments, dtype='float32')})
+        result.to_parquet(cache_file, index=False)
+        return result
+    except (NewsAPIException, requests.RequestException):
+        return pd.DataFrame(columns=['Date', 'Ticker', 'Headline', 'Sentiment'])
+
+
+# Figure builders are cached on the (hashed) input frame: reruns with
+# unchanged data reuse the serialized figure spec instead of rebuilding it.
+@st.cache_data(show_spinner=False)
+def make_price_facets(df):
+    """All closing-price charts as one faceted figure — a single payload to the browser."""
+    return px.line(df, x='Date', y='Close', color='Ticker',
+                   facet_col='Ticker', facet_col_wrap=2, title="Closing Prices")
+
+
+@st.cache_data(show_spinner=False)
+def make_sentiment_bar(df):
+    return px.bar(df, x="Ticker", y="Sentiment", color="Ticker", title="Average Sentiment")
+
+
+@st.cache_data(show_spinner=False)
+def make_pie_facets(news_df):
+    """One figure holding a sentiment pie per ticker (px.pie has no facet support)."""
+    counts = news_df.groupby(['Ticker', 'Category'], observed=True).size().reset_index(name='Count')
+    tickers = counts['Ticker'].unique().tolist()
+    cols = min(2, len(tickers))
+    rows = -(-len(tickers) // cols)
+    fig = make_subplots(rows=rows, cols=cols,
+                        specs=[[{'type': 'domain'}] * cols for _ in range(rows)],
+                        subplot_titles=tickers)
+    for i, ticker in enumerate(tickers):
+        sub = counts[counts['Ticker'] == ticker]
+        fig.add_trace(go.Pie(labels=sub['Category'], values=sub['Count'], name=ticker),
+                      row=i // cols + 1, col=i % cols + 1)
+    return fig